@@ -2,21 +2,155 @@ import time
 import openai
 import requests
 import json
+from types import SimpleNamespace
 
 BING_CUSTOM_SEARCH_API_URL = "https://api.bing.microsoft.com/v7.0/custom/search?"
 
+RUN_FINAL_STATUS_LIST = ["completed", "failed", "incomplete", "requires_action"]
+
+class cassetteMismatchError(Exception):
+    pass
+
+def toRecordable(response):
+    """Cette fonction convertit une réponse de l'API OpenAI en données JSON simples à écrire dans une cassette."""
+    # Les listes paginées (ex : les messages d'un thread) sont enregistrées comme une simple liste de leurs éléments
+    if hasattr(response, "iter_pages"):
+        return([toRecordable(e) for e in response])
+    return(response.model_dump(mode="json"))
+
+def toRecordableRequest(kwargs):
+    """Cette fonction convertit les arguments d'une requête en données JSON simples à écrire dans une cassette."""
+    return(json.loads(json.dumps(kwargs, default=str)))
+
+def toReplayable(data):
+    """Cette fonction reconvertit des données JSON enregistrées en un objet avec accès par attributs,
+    comme les réponses de l'API OpenAI (ex : run.required_action.submit_tool_outputs.tool_calls)."""
+    if isinstance(data, dict):
+        return(SimpleNamespace(**{key: toReplayable(value) for key, value in data.items()}))
+    if isinstance(data, list):
+        return([toReplayable(e) for e in data])
+    return(data)
+
+class LiveTransport():
+    """Cette classe envoie les requêtes HTTP et les appels à l'API OpenAI sur le réseau."""
+
+    def __init__(self, openAIAPIKey):
+        """On initialise le client OpenAI avec la clé API fournie."""
+        self.openaiClient = openai.OpenAI(api_key=openAIAPIKey)
+
+    def callOpenaiApi(self, endpoint, **kwargs):
+        """Cette fonction appelle un endpoint de l'API OpenAI donné sous forme de chemin pointé (ex : 'beta.threads.create')."""
+        function = self.openaiClient
+        for attribute in endpoint.split("."):
+            function = getattr(function, attribute)
+        return(function(**kwargs))
+
+    def httpGet(self, url, headers={}):
+        """Cette fonction effectue une requête HTTP GET et retourne la réponse sous forme de texte."""
+        return(requests.get(url, headers=headers).text)
+
+    def getUserInput(self):
+        """Cette fonction lit un message tapé par l'utilisateur."""
+        return(input())
+
+    def sleep(self, seconds):
+        """Cette fonction attend le nombre de secondes donné."""
+        time.sleep(seconds)
+
+class RecordingTransport(LiveTransport):
+    """Cette classe envoie les requêtes sur le réseau comme 'LiveTransport' et enregistre
+    chaque interaction, à écrire dans un fichier cassette avec 'saveCassette'."""
+
+    def __init__(self, cassettePath, openAIAPIKey):
+        """On initialise le client OpenAI et la liste vide des interactions enregistrées."""
+        super().__init__(openAIAPIKey)
+        self.cassettePath = cassettePath
+        self.interactionList = []
+
+    def callOpenaiApi(self, endpoint, **kwargs):
+        """Cette fonction appelle un endpoint de l'API OpenAI et enregistre sa réponse."""
+        response = super().callOpenaiApi(endpoint, **kwargs)
+        recordedResponse = toRecordable(response)
+        # Les vérifications intermédiaires d'une exécution ne sont pas enregistrées pour garder la cassette compacte,
+        # le rejeu renvoie directement le statut final de l'exécution
+        if endpoint != "beta.threads.runs.retrieve" or recordedResponse["status"] in RUN_FINAL_STATUS_LIST:
+            self.interactionList.append({"call": endpoint, "request": toRecordableRequest(kwargs), "response": recordedResponse})
+        return(response)
+
+    def httpGet(self, url, headers={}):
+        """Cette fonction effectue une requête HTTP GET et enregistre sa réponse.
+        Les en-têtes ne sont pas enregistrés car ils contiennent la clé d'abonnement."""
+        responseText = super().httpGet(url, headers=headers)
+        self.interactionList.append({"call": "http.get", "request": {"url": url}, "response": responseText})
+        return(responseText)
+
+    def getUserInput(self):
+        """Cette fonction lit un message tapé par l'utilisateur et l'enregistre."""
+        userMessage = super().getUserInput()
+        self.interactionList.append({"call": "input", "request": {}, "response": userMessage})
+        return(userMessage)
+
+    def saveCassette(self):
+        """Cette fonction écrit les interactions enregistrées dans le fichier cassette."""
+        with open(self.cassettePath, "w", encoding="utf-8") as cassetteFile:
+            json.dump(self.interactionList, cassetteFile, ensure_ascii=False, separators=(",", ":"))
+
+class ReplayTransport():
+    """Cette classe rejoue les interactions enregistrées dans un fichier cassette, sans aucun accès réseau.
+    En mode 'fastForward', les délais d'attente sont sautés."""
+
+    def __init__(self, cassettePath, fastForward=True):
+        """On charge les interactions enregistrées depuis le fichier cassette."""
+        self.openaiClient = None
+        self.fastForward = fastForward
+        with open(cassettePath, "r", encoding="utf-8") as cassetteFile:
+            self.interactionList = json.load(cassetteFile)
+        self.interactionIndex = 0
+
+    def getNextResponse(self, call, request):
+        """Cette fonction renvoie la prochaine réponse enregistrée, en vérifiant qu'elle correspond à l'appel et à la requête attendus."""
+        request = toRecordableRequest(request)
+        if self.interactionIndex >= len(self.interactionList):
+            raise cassetteMismatchError("No recorded interaction left for call '" + call + "' with request " + json.dumps(request, ensure_ascii=False))
+        interaction = self.interactionList[self.interactionIndex]
+        if interaction["call"] != call or interaction["request"] != request:
+            raise cassetteMismatchError("At interaction " + str(self.interactionIndex) + ", expected call '" + call + "' with request "
+                                        + json.dumps(request, ensure_ascii=False) + " but the cassette recorded call '" + interaction["call"]
+                                        + "' with request " + json.dumps(interaction["request"], ensure_ascii=False))
+        self.interactionIndex += 1
+        return(interaction["response"])
+
+    def callOpenaiApi(self, endpoint, **kwargs):
+        """Cette fonction renvoie la réponse enregistrée d'un endpoint de l'API OpenAI."""
+        return(toReplayable(self.getNextResponse(endpoint, kwargs)))
+
+    def httpGet(self, url, headers={}):
+        """Cette fonction renvoie la réponse enregistrée d'une requête HTTP GET."""
+        return(self.getNextResponse("http.get", {"url": url}))
+
+    def getUserInput(self):
+        """Cette fonction renvoie le message utilisateur enregistré."""
+        return(self.getNextResponse("input", {}))
+
+    def sleep(self, seconds):
+        """Cette fonction attend le nombre de secondes donné, sauf en mode 'fastForward'."""
+        if not self.fastForward:
+            time.sleep(seconds)
+
 class BingSearchEngine():
     """On définit une classe pour encapsuler les fonctions de recherche Bing et d'analyse des résultats de recherche."""
 
-    def __init__(self, openAIAPIKey, subscriptionKey, model="gpt-3.5-turbo"):
-        """On initialise le client OpenAI  et la clé d'abonnement Bing avec les clés API fournies."""
-        self.openaiClient = openai.OpenAI(api_key=openAIAPIKey)
+    def __init__(self, openAIAPIKey, subscriptionKey, model="gpt-3.5-turbo", transport=None):
+        """On initialise le client OpenAI  et la clé d'abonnement Bing avec les clés API fournies.
+        Un transport d'enregistrement ou de rejeu peut être donné, sinon les requêtes sont envoyées sur le réseau."""
+        self.transport = transport if transport is not None else LiveTransport(openAIAPIKey)
+        self.openaiClient = self.transport.openaiClient
         self.subscriptionKey = subscriptionKey
         self.model = model
 
     def getLLMAnswer(self, userMessage, systemMessage="You are a helpful assistant", model="gpt-3.5-turbo") :
         """Cette fonction interagit avec un LLM pour obtenir une réponse à partir d'un message utilisateur"""
-        chatCompletion = self.openaiClient.chat.completions.create(model=model, messages=[{"role": "system", "content": systemMessage}, {"role": "user", "content": userMessage}])
+        chatCompletion = self.transport.callOpenaiApi("chat.completions.create", model=model, messages=[{"role": "system", "content": systemMessage}, {"role": "user", "content": userMessage}])
         return(chatCompletion.choices[0].message.content)
 
     def runBingSearch(self,searchQuery, verbosity=0):
@@ -29,10 +163,10 @@ class BingSearchEngine():
         bingQuery = BING_CUSTOM_SEARCH_API_URL + "q='" + searchQuery + "'&customconfig=0"
 
         # On effectue la requête HTTP
-        response = requests.get(bingQuery, headers={'Ocp-Apim-Subscription-Key': self.subscriptionKey})
+        responseText = self.transport.httpGet(bingQuery, headers={'Ocp-Apim-Subscription-Key': self.subscriptionKey})
 
         # On récupère les résultats
-        responseData = json.loads(response.text)
+        responseData = json.loads(responseText)
         results = responseData.get("webPages", {}).get("value", [])
 
         # On formate les résultats proprement
@@ -155,14 +289,16 @@ class runIncompleteError(Exception):
 class OpenaiApiWithEasyToolsAndWebBrowsing():
     """Cette classe permet d'interagir avec l'API OpenAI pour obtenir des réponses à partir de messages utilisateurs."""
 
-    def __init__(self, openAIAPIKey):
-        """On initialise le client OpenAI avec la clé API fournie."""
-        self.openaiClient = openai.OpenAI(api_key=openAIAPIKey)
+    def __init__(self, openAIAPIKey, transport=None):
+        """On initialise le client OpenAI avec la clé API fournie.
+        Un transport d'enregistrement ou de rejeu peut être donné, sinon les requêtes sont envoyées sur le réseau."""
+        self.transport = transport if transport is not None else LiveTransport(openAIAPIKey)
+        self.openaiClient = self.transport.openaiClient
 
     def getMessageListFromThread(self, threadId):
         """Cette fonction affiche les messages d'un fil de discussion d'un thread/d'une conversation.
         La liste en sortie est complétée de droite à gauche, le dernier message est le premier de la liste."""
-        messageList = self.openaiClient.beta.threads.messages.list(thread_id=threadId)
+        messageList = self.transport.callOpenaiApi("beta.threads.messages.list", thread_id=threadId)
         messageListThread = [message.content[0].text.value for message in messageList if message.role == "assistant"]
         return(messageListThread)
 
@@ -170,9 +306,9 @@ class OpenaiApiWithEasyToolsAndWebBrowsing():
         """Cette fonction attend la fin d'une exécution de thread/de conversation et renvoie le résultat"""
         while True:
             # On check le statut de l'exécution 10 fois par seconde
-            time.sleep(0.1)
-            run = self.openaiClient.beta.threads.runs.retrieve(thread_id=threadId, run_id=runId)
-            if run.status in ["completed", "failed", "incomplete", "requires_action"]:
+            self.transport.sleep(0.1)
+            run = self.transport.callOpenaiApi("beta.threads.runs.retrieve", thread_id=threadId, run_id=runId)
+            if run.status in RUN_FINAL_STATUS_LIST:
                 return(run)
             # Lignes ci-dessous non nécessaires
             elif run.status == "in_progress" :
@@ -217,28 +353,29 @@ class OpenaiApiWithEasyToolsAndWebBrowsing():
         une conversation continue avec input utilisateur (mettre alors userMessage=None)."""
 
         # On initialise l'assistant avec la liste des outils
-        assistant = self.openaiClient.beta.assistants.create(instructions=systemMessage, model=model, tools=toolDescriptionList)
+        assistant = self.transport.callOpenaiApi("beta.assistants.create", instructions=systemMessage, model=model, tools=toolDescriptionList)
 
         # On crée un fil de discussion
-        thread = self.openaiClient.beta.threads.create()
+        thread = self.transport.callOpenaiApi("beta.threads.create")
 
         # Boucle de conversation continue
         while True:
             if mode == "continuous":
                 print("\nYour request (Type 'exit' to exit the program) : ")
-                userMessage = input()
+                userMessage = self.transport.getUserInput()
                 if userMessage.lower() == "exit":
                     break
 
             # Création d'un message et d'une exécution
-            self.openaiClient.beta.threads.messages.create(thread_id=thread.id, role="user", content=userMessage)
-            run = self.openaiClient.beta.threads.runs.create(thread_id=thread.id,
-                                                             assistant_id=assistant.id,
-                                                             temperature=temperature,
-                                                             top_p=top_p,
-                                                             max_prompt_tokens=max_prompt_tokens,
-                                                             max_completion_tokens=max_completion_tokens
-                                                             )
+            self.transport.callOpenaiApi("beta.threads.messages.create", thread_id=thread.id, role="user", content=userMessage)
+            run = self.transport.callOpenaiApi("beta.threads.runs.create",
+                                               thread_id=thread.id,
+                                               assistant_id=assistant.id,
+                                               temperature=temperature,
+                                               top_p=top_p,
+                                               max_prompt_tokens=max_prompt_tokens,
+                                               max_completion_tokens=max_completion_tokens
+                                               )
             # Attente de la fin de l'exécution
             run = self.waitForRunCompletion(thread.id, run.id)
 
@@ -250,7 +387,7 @@ class OpenaiApiWithEasyToolsAndWebBrowsing():
                     print("Tool(s) called:")
                     [print("   " + str(t)) for t in toolsToCall]
                 toolReturnList = self.getToolReturnList(toolsToCall, toolList=toolList)
-                run = self.openaiClient.beta.threads.runs.submit_tool_outputs(thread_id=thread.id, run_id=run.id, tool_outputs=toolReturnList)
+                run = self.transport.callOpenaiApi("beta.threads.runs.submit_tool_outputs", thread_id=thread.id, run_id=run.id, tool_outputs=toolReturnList)
                 # Attente de la fin de l'exécution
                 run = self.waitForRunCompletion(thread.id, run.id)
 
@@ -268,4 +405,4 @@ class OpenaiApiWithEasyToolsAndWebBrowsing():
 
             # Affichage des messages et on recommence la boucle pour continuer la conversation
             print("\nAssistant response:\n" + self.getMessageListFromThread(thread.id)[0])
-            time.sleep(0.1)
\ No newline at end of file
+            self.transport.sleep(0.1)
\ No newline at end of file
@@ -2,21 +2,155 @@ import time
 import openai
 import requests
 import json
+from types import SimpleNamespace
 
 BING_CUSTOM_SEARCH_API_URL = "https://api.bing.microsoft.com/v7.0/custom/search?"
 
+RUN_FINAL_STATUS_LIST = ["completed", "failed", "incomplete", "requires_action"]
+
+class cassetteMismatchError(Exception):
+    pass
+
+def toRecordable(response):
+    """This function converts an OpenAI API response into plain JSON data to be written in a cassette."""
+    # Paginated lists (e.g. the messages of a thread) are recorded as a plain list of their items
+    if hasattr(response, "iter_pages"):
+        return([toRecordable(e) for e in response])
+    return(response.model_dump(mode="json"))
+
+def toRecordableRequest(kwargs):
+    """This function converts the arguments of a request into plain JSON data to be written in a cassette."""
+    return(json.loads(json.dumps(kwargs, default=str)))
+
+def toReplayable(data):
+    """This function converts recorded JSON data back into an object with attribute access,
+    like the OpenAI API responses (e.g. run.required_action.submit_tool_outputs.tool_calls)."""
+    if isinstance(data, dict):
+        return(SimpleNamespace(**{key: toReplayable(value) for key, value in data.items()}))
+    if isinstance(data, list):
+        return([toReplayable(e) for e in data])
+    return(data)
+
+class LiveTransport():
+    """This class sends the HTTP requests and the OpenAI API calls over the network."""
+
+    def __init__(self, openAIAPIKey):
+        """Initialize the OpenAI client using the provided API key."""
+        self.openaiClient = openai.OpenAI(api_key=openAIAPIKey)
+
+    def callOpenaiApi(self, endpoint, **kwargs):
+        """This function calls an OpenAI API endpoint given as a dotted path (e.g. 'beta.threads.create')."""
+        function = self.openaiClient
+        for attribute in endpoint.split("."):
+            function = getattr(function, attribute)
+        return(function(**kwargs))
+
+    def httpGet(self, url, headers={}):
+        """This function performs an HTTP GET request and returns the response as text."""
+        return(requests.get(url, headers=headers).text)
+
+    def getUserInput(self):
+        """This function reads a message typed by the user."""
+        return(input())
+
+    def sleep(self, seconds):
+        """This function waits for the given number of seconds."""
+        time.sleep(seconds)
+
+class RecordingTransport(LiveTransport):
+    """This class sends the requests over the network like 'LiveTransport' and records
+    every interaction, to be written in a cassette file with 'saveCassette'."""
+
+    def __init__(self, cassettePath, openAIAPIKey):
+        """Initialize the OpenAI client and the empty list of recorded interactions."""
+        super().__init__(openAIAPIKey)
+        self.cassettePath = cassettePath
+        self.interactionList = []
+
+    def callOpenaiApi(self, endpoint, **kwargs):
+        """This function calls an OpenAI API endpoint and records its response."""
+        response = super().callOpenaiApi(endpoint, **kwargs)
+        recordedResponse = toRecordable(response)
+        # The intermediate polls of a run are not recorded to keep the cassette compact,
+        # the replay directly returns the final status of the run
+        if endpoint != "beta.threads.runs.retrieve" or recordedResponse["status"] in RUN_FINAL_STATUS_LIST:
+            self.interactionList.append({"call": endpoint, "request": toRecordableRequest(kwargs), "response": recordedResponse})
+        return(response)
+
+    def httpGet(self, url, headers={}):
+        """This function performs an HTTP GET request and records its response.
+        The headers are not recorded since they contain the subscription key."""
+        responseText = super().httpGet(url, headers=headers)
+        self.interactionList.append({"call": "http.get", "request": {"url": url}, "response": responseText})
+        return(responseText)
+
+    def getUserInput(self):
+        """This function reads a message typed by the user and records it."""
+        userMessage = super().getUserInput()
+        self.interactionList.append({"call": "input", "request": {}, "response": userMessage})
+        return(userMessage)
+
+    def saveCassette(self):
+        """This function writes the recorded interactions in the cassette file."""
+        with open(self.cassettePath, "w", encoding="utf-8") as cassetteFile:
+            json.dump(self.interactionList, cassetteFile, ensure_ascii=False, separators=(",", ":"))
+
+class ReplayTransport():
+    """This class replays the interactions recorded in a cassette file, without any network access.
+    In 'fastForward' mode, the polling delays are skipped."""
+
+    def __init__(self, cassettePath, fastForward=True):
+        """Load the recorded interactions from the cassette file."""
+        self.openaiClient = None
+        self.fastForward = fastForward
+        with open(cassettePath, "r", encoding="utf-8") as cassetteFile:
+            self.interactionList = json.load(cassetteFile)
+        self.interactionIndex = 0
+
+    def getNextResponse(self, call, request):
+        """This function returns the next recorded response, checking that it matches the expected call and request."""
+        request = toRecordableRequest(request)
+        if self.interactionIndex >= len(self.interactionList):
+            raise cassetteMismatchError("No recorded interaction left for call '" + call + "' with request " + json.dumps(request, ensure_ascii=False))
+        interaction = self.interactionList[self.interactionIndex]
+        if interaction["call"] != call or interaction["request"] != request:
+            raise cassetteMismatchError("At interaction " + str(self.interactionIndex) + ", expected call '" + call + "' with request "
+                                        + json.dumps(request, ensure_ascii=False) + " but the cassette recorded call '" + interaction["call"]
+                                        + "' with request " + json.dumps(interaction["request"], ensure_ascii=False))
+        self.interactionIndex += 1
+        return(interaction["response"])
+
+    def callOpenaiApi(self, endpoint, **kwargs):
+        """This function returns the recorded response of an OpenAI API endpoint."""
+        return(toReplayable(self.getNextResponse(endpoint, kwargs)))
+
+    def httpGet(self, url, headers={}):
+        """This function returns the recorded response of an HTTP GET request."""
+        return(self.getNextResponse("http.get", {"url": url}))
+
+    def getUserInput(self):
+        """This function returns the recorded user message."""
+        return(self.getNextResponse("input", {}))
+
+    def sleep(self, seconds):
+        """This function waits for the given number of seconds, unless in 'fastForward' mode."""
+        if not self.fastForward:
+            time.sleep(seconds)
+
 class BingSearchEngine():
     """We define a class to encapsulate Bing search functions and search result analysis."""
 
-    def __init__(self, openAIAPIKey, subscriptionKey, model="gpt-3.5-turbo"):
-        """Initialize the OpenAI client and the Bing subscription key using the provided API keys."""
-        self.openaiClient = openai.OpenAI(api_key=openAIAPIKey)
+    def __init__(self, openAIAPIKey, subscriptionKey, model="gpt-3.5-turbo", transport=None):
+        """Initialize the OpenAI client and the Bing subscription key using the provided API keys.
+        A recording or replay transport can be given, otherwise the requests are sent over the network."""
+        self.transport = transport if transport is not None else LiveTransport(openAIAPIKey)
+        self.openaiClient = self.transport.openaiClient
         self.subscriptionKey = subscriptionKey
         self.model = model
 
     def getLLMAnswer(self, userMessage, systemMessage="You are a helpful assistant", model="gpt-3.5-turbo") :
         """This function interacts with an LLM to get a response from a user message."""
-        chatCompletion = self.openaiClient.chat.completions.create(model=model, messages=[{"role": "system", "content": systemMessage}, {"role": "user", "content": userMessage}])
+        chatCompletion = self.transport.callOpenaiApi("chat.completions.create", model=model, messages=[{"role": "system", "content": systemMessage}, {"role": "user", "content": userMessage}])
         return(chatCompletion.choices[0].message.content)
 
     def runBingSearch(self,searchQuery, verbosity=0):
@@ -29,10 +163,10 @@ class BingSearchEngine():
         bingQuery = BING_CUSTOM_SEARCH_API_URL + "q='" + searchQuery + "'&customconfig=0"
 
         # Perform the HTTP request
-        response = requests.get(bingQuery, headers={'Ocp-Apim-Subscription-Key': self.subscriptionKey})
+        responseText = self.transport.httpGet(bingQuery, headers={'Ocp-Apim-Subscription-Key': self.subscriptionKey})
 
         # Retrieve the results
-        responseData = json.loads(response.text)
+        responseData = json.loads(responseText)
         results = responseData.get("webPages", {}).get("value", [])
 
         # Format the results properly
@@ -155,14 +289,16 @@ class runIncompleteError(Exception):
 class OpenaiApiWithEasyToolsAndWebBrowsing():
     """This class allows interacting with the OpenAI API to get responses from user messages."""
 
-    def __init__(self, openAIAPIKey):
-        """Initialize the OpenAI client with the provided API key."""
-        self.openaiClient = openai.OpenAI(api_key=openAIAPIKey)
+    def __init__(self, openAIAPIKey, transport=None):
+        """Initialize the OpenAI client with the provided API key.
+        A recording or replay transport can be given, otherwise the requests are sent over the network."""
+        self.transport = transport if transport is not None else LiveTransport(openAIAPIKey)
+        self.openaiClient = self.transport.openaiClient
 
     def getMessageListFromThread(self, threadId):
         """This function displays the messages of a thread/discussion thread.
         The output list is populated from right to left, the last message is the first in the list."""
-        messageList = self.openaiClient.beta.threads.messages.list(thread_id=threadId)
+        messageList = self.transport.callOpenaiApi("beta.threads.messages.list", thread_id=threadId)
         messageListThread = [message.content[0].text.value for message in messageList if message.role == "assistant"]
         return(messageListThread)
 
@@ -170,9 +306,9 @@ class OpenaiApiWithEasyToolsAndWebBrowsing():
         """This function waits for the completion of a thread/conversation run and returns the result"""
         while True:
             # Check the status of the run 10 times per second
-            time.sleep(0.1)
-            run = self.openaiClient.beta.threads.runs.retrieve(thread_id=threadId, run_id=runId)
-            if run.status in ["completed", "failed", "incomplete", "requires_action"]:
+            self.transport.sleep(0.1)
+            run = self.transport.callOpenaiApi("beta.threads.runs.retrieve", thread_id=threadId, run_id=runId)
+            if run.status in RUN_FINAL_STATUS_LIST:
                 return(run)
             # Lines below are not necessary
             elif run.status == "in_progress" :
@@ -217,28 +353,29 @@ class OpenaiApiWithEasyToolsAndWebBrowsing():
         continuous conversation with user input (then set userMessage=None)."""
 
         # Initialize the assistant with the list of tools
-        assistant = self.openaiClient.beta.assistants.create(instructions=systemMessage, model=model, tools=toolDescriptionList)
+        assistant = self.transport.callOpenaiApi("beta.assistants.create", instructions=systemMessage, model=model, tools=toolDescriptionList)
 
         # Create a discussion thread
-        thread = self.openaiClient.beta.threads.create()
+        thread = self.transport.callOpenaiApi("beta.threads.create")
 
         # Continuous conversation loop
         while True:
             if mode == "continuous":
                 print("\nYour request (Type 'exit' to exit the program) : ")
-                userMessage = input()
+                userMessage = self.transport.getUserInput()
                 if userMessage.lower() == "exit":
                     break
 
             # Create a message and a run
-            self.openaiClient.beta.threads.messages.create(thread_id=thread.id, role="user", content=userMessage)
-            run = self.openaiClient.beta.threads.runs.create(thread_id=thread.id,
-                                                             assistant_id=assistant.id,
-                                                             temperature=temperature,
-                                                             top_p=top_p,
-                                                             max_prompt_tokens=max_prompt_tokens,
-                                                             max_completion_tokens=max_completion_tokens
-                                                             )
+            self.transport.callOpenaiApi("beta.threads.messages.create", thread_id=thread.id, role="user", content=userMessage)
+            run = self.transport.callOpenaiApi("beta.threads.runs.create",
+                                               thread_id=thread.id,
+                                               assistant_id=assistant.id,
+                                               temperature=temperature,
+                                               top_p=top_p,
+                                               max_prompt_tokens=max_prompt_tokens,
+                                               max_completion_tokens=max_completion_tokens
+                                               )
             # Wait for the end of the run
             run = self.waitForRunCompletion(thread.id, run.id)
 
@@ -250,7 +387,7 @@ class OpenaiApiWithEasyToolsAndWebBrowsing():
                     print("Tool(s) called:")
                     [print("   " + str(t)) for t in toolsToCall]
                 toolReturnList = self.getToolReturnList(toolsToCall, toolList=toolList)
-                run = self.openaiClient.beta.threads.runs.submit_tool_outputs(thread_id=thread.id, run_id=run.id, tool_outputs=toolReturnList)
+                run = self.transport.callOpenaiApi("beta.threads.runs.submit_tool_outputs", thread_id=thread.id, run_id=run.id, tool_outputs=toolReturnList)
                 # Wait for the end of the run
                 run = self.waitForRunCompletion(thread.id, run.id)
 
@@ -268,4 +405,4 @@ class OpenaiApiWithEasyToolsAndWebBrowsing():
 
             # Display the messages and restart the loop to continue the conversation
             print("\nAssistant response:\n" + self.getMessageListFromThread(thread.id)[0])
-            time.sleep(0.1)
+            self.transport.sleep(0.1)
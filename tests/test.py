@@ -4,10 +4,17 @@ import src.openai_api_with_easy_tools_and_web_browsing as webBrowsingApiGPT
 subscriptionKey = ""
 openAIAPIKey = ""
 
+# Choose how the requests are sent: replayed from the cassette file recorded with fake responses (default),
+# without any network access and without polling delays in 'fastForward' mode, sent over the network,
+# or sent over the network and recorded in the cassette file
+transport = webBrowsingApiGPT.ReplayTransport("tests/cassette.json", fastForward=True)
+# transport = webBrowsingApiGPT.LiveTransport(openAIAPIKey)
+# transport = webBrowsingApiGPT.RecordingTransport("tests/cassette.json", openAIAPIKey)
+
 ### Creation of the Bing search tool ###
 
 # Create a Bing search engine that synthesizes results with GPT-3.5-turbo
-bingSearchEngine = webBrowsingApiGPT.BingSearchEngine(openAIAPIKey, subscriptionKey, model="gpt-3.5-turbo")
+bingSearchEngine = webBrowsingApiGPT.BingSearchEngine(openAIAPIKey, subscriptionKey, model="gpt-3.5-turbo", transport=transport)
 # Rename the Bing search function (otherwise it does not work as a tool in the OpenAI API)
 bingSearch = bingSearchEngine.bingSearch
 # Take the already made Bing search function description (the function must be named 'bingSearch')
@@ -42,7 +49,7 @@ adderDescription = {
 }
 
 # Create an instance of the 'OpenaiApiWithEasyToolsAndWebBrowsing' class
-openaiApiWithEasyToolsAndWebBrowsing = webBrowsingApiGPT.OpenaiApiWithEasyToolsAndWebBrowsing(openAIAPIKey)
+openaiApiWithEasyToolsAndWebBrowsing = webBrowsingApiGPT.OpenaiApiWithEasyToolsAndWebBrowsing(openAIAPIKey, transport=transport)
 
 ### Return a response to a prompt in 'ponctual' mode ###
 print("PONCTUAL MODE\n")
@@ -63,3 +70,7 @@ openaiApiWithEasyToolsAndWebBrowsing.getLLMAnswer(None, systemMessage="You are a
                                                   toolList=[bingSearch, adder], toolDescriptionList=[bingSearchDescription, adderDescription],
                                                   max_prompt_tokens=4096, max_completion_tokens=2048,
                                                   verbosity=1)
+
+# Save the recorded interactions (only in recording mode)
+if isinstance(transport, webBrowsingApiGPT.RecordingTransport):
+    transport.saveCassette()
@@ -4,10 +4,17 @@ import src.openai_api_with_easy_tools_and_web_browsing as webBrowsingApiGPT
 subscriptionKey = ""
 openAIAPIKey = ""
 
+# On choisit comment les requêtes sont envoyées : rejouées depuis le fichier cassette enregistré avec des réponses factices (par défaut),
+# sans aucun accès réseau et sans délais d'attente en mode 'fastForward', envoyées sur le réseau,
+# ou envoyées sur le réseau et enregistrées dans le fichier cassette
+transport = webBrowsingApiGPT.ReplayTransport("tests/cassette_fr.json", fastForward=True)
+# transport = webBrowsingApiGPT.LiveTransport(openAIAPIKey)
+# transport = webBrowsingApiGPT.RecordingTransport("tests/cassette_fr.json", openAIAPIKey)
+
 ### Création de l'outil de recherche Bing ###
 
 # On crée un moteur de recherche Bing qui synthétise les résultats avec GPT-3.5-turbo
-bingSearchEngine = webBrowsingApiGPT.BingSearchEngine(openAIAPIKey, subscriptionKey, model="gpt-3.5-turbo")
+bingSearchEngine = webBrowsingApiGPT.BingSearchEngine(openAIAPIKey, subscriptionKey, model="gpt-3.5-turbo", transport=transport)
 # On renomme la fonction de recherche Bing (sinon cela ne fonctionne pas en tant que tool dans l'API d'OpenAI)
 bingSearch = bingSearchEngine.bingSearch
 # On prend la description de la fonction de recherche Bing déjà faite (la fonction doit être nommée 'bingSearch')
@@ -42,7 +49,7 @@ adderDescription = {
 }
 
 # On crée une instance de la classe 'OpenaiApiWithEasyToolsAndWebBrowsing'
-openaiApiWithEasyToolsAndWebBrowsing = webBrowsingApiGPT.OpenaiApiWithEasyToolsAndWebBrowsing(openAIAPIKey)
+openaiApiWithEasyToolsAndWebBrowsing = webBrowsingApiGPT.OpenaiApiWithEasyToolsAndWebBrowsing(openAIAPIKey, transport=transport)
 
 ### Renvoie d'une réponse à un prompt en mode 'ponctual' ###
 print("MODE PONCTUEL\n")
@@ -62,4 +69,8 @@ print("\n\n\nMODE CONTINUE\n")
 openaiApiWithEasyToolsAndWebBrowsing.getLLMAnswer(None, systemMessage="You are a helpful assistant", model="gpt-4o", mode="continuous",
                                                   toolList=[bingSearch, adder], toolDescriptionList=[bingSearchDescription, adderDescription],
                                                   max_prompt_tokens=4096, max_completion_tokens=2048,
-                                                  verbosity=1)
\ No newline at end of file
+                                                  verbosity=1)
+
+# On sauvegarde les interactions enregistrées (seulement en mode enregistrement)
+if isinstance(transport, webBrowsingApiGPT.RecordingTransport):
+    transport.saveCassette()
@@ -0,0 +1,89 @@
+import os
+import json
+import types
+import pytest
+from openai.types.chat import ChatCompletion
+import src.openai_api_with_easy_tools_and_web_browsing as webBrowsingApiGPT
+
+# Cassette recorded from the flows of 'test.py' with fake OpenAI and Bing responses
+CASSETTE_PATH = os.path.join(os.path.dirname(__file__), "cassette.json")
+
+PROMPT = "Can you search the internet for the population of Paris and New York in the year 2015, then add the two values together and tell me the result, and then add 10,000,000 to that result"
+
+def adder(a, b):
+    """This function adds two numbers together"""
+    return (str(a + b))
+
+adderDescription = {
+    "type": "function",
+    "function": {
+        "name": "adder",
+        "description": "Add two numbers together",
+        "parameters": {
+            "type": "object",
+            "properties": {
+                "a": {
+                    "type": "integer",
+                    "description": "The first number to add"
+                },
+                "b": {
+                    "type": "integer",
+                    "description": "The second number to add"
+                },
+            },
+            "required": ["a", "b"]
+        }
+    }
+}
+
+def getPonctualAnswer(transport, prompt):
+    """This function runs the 'ponctual' mode example of 'test.py' with the given transport."""
+    bingSearchEngine = webBrowsingApiGPT.BingSearchEngine("", "", model="gpt-3.5-turbo", transport=transport)
+    bingSearch = bingSearchEngine.bingSearch
+    openaiApiWithEasyToolsAndWebBrowsing = webBrowsingApiGPT.OpenaiApiWithEasyToolsAndWebBrowsing("", transport=transport)
+    return(openaiApiWithEasyToolsAndWebBrowsing.getLLMAnswer(prompt, systemMessage="You are a helpful assistant", model="gpt-3.5-turbo", mode="ponctual",
+                                                             toolList=[bingSearch, adder], toolDescriptionList=[webBrowsingApiGPT.BING_SEARCH_DESCRIPTION, adderDescription],
+                                                             temperature=0.9, top_p=1))
+
+def test_replayPonctualMode():
+    """The 'ponctual' mode example, with a Bing search and two additions, is replayed from the cassette."""
+    transport = webBrowsingApiGPT.ReplayTransport(CASSETTE_PATH, fastForward=True)
+    answer = getPonctualAnswer(transport, PROMPT)
+    assert answer == "The total population of Paris and New York in 2015 was about 10,756,893 inhabitants. " \
+                     "If 10,000,000 is added to this number, it becomes 20,756,893."
+
+def test_replayWithChangedPromptRaisesMismatch():
+    """A prompt different from the recorded one is not answered with stale data."""
+    transport = webBrowsingApiGPT.ReplayTransport(CASSETTE_PATH, fastForward=True)
+    with pytest.raises(webBrowsingApiGPT.cassetteMismatchError, match="Paris and London"):
+        getPonctualAnswer(transport, PROMPT.replace("Paris and New York", "Paris and London"))
+
+class FakeCompletions():
+    """This class returns a fixed chat completion instead of calling the OpenAI API."""
+
+    def create(self, **kwargs):
+        return(ChatCompletion.model_validate({"id": "chatcmpl_1", "object": "chat.completion", "created": 0, "model": kwargs["model"],
+                                              "choices": [{"index": 0, "finish_reason": "stop", "message": {"role": "assistant", "content": "population Paris 2015"}}]}))
+
+def test_recordThenReplay(tmp_path, monkeypatch):
+    """The interactions recorded and saved in a cassette are replayed identically, and a changed request raises."""
+    cassettePath = str(tmp_path / "cassette.json")
+    bingResponseText = json.dumps({"webPages": {"value": [{"name": "Paris", "url": "https://example.com/paris", "snippet": "2,206,488 inhabitants"}]}})
+    monkeypatch.setattr(webBrowsingApiGPT.requests, "get", lambda url, headers={}: types.SimpleNamespace(text=bingResponseText))
+
+    transport = webBrowsingApiGPT.RecordingTransport(cassettePath, "fake-key")
+    transport.openaiClient.chat = types.SimpleNamespace(completions=FakeCompletions())
+    bingSearchEngine = webBrowsingApiGPT.BingSearchEngine("", "subscription-key", transport=transport)
+    recordedQueries = bingSearchEngine.getSearchQueries("population of Paris")
+    recordedResults = bingSearchEngine.runBingSearch(recordedQueries[0])
+    # Recording returns the original OpenAI response objects, like the live mode
+    assert isinstance(transport.callOpenaiApi("chat.completions.create", model="gpt-3.5-turbo", messages=[]), ChatCompletion)
+    transport.saveCassette()
+    assert "subscription-key" not in open(cassettePath, encoding="utf-8").read()
+
+    transport = webBrowsingApiGPT.ReplayTransport(cassettePath, fastForward=True)
+    bingSearchEngine = webBrowsingApiGPT.BingSearchEngine("", "", transport=transport)
+    assert bingSearchEngine.getSearchQueries("population of Paris") == recordedQueries
+    assert bingSearchEngine.runBingSearch(recordedQueries[0]) == recordedResults
+    with pytest.raises(webBrowsingApiGPT.cassetteMismatchError, match="other"):
+        transport.callOpenaiApi("chat.completions.create", model="other", messages=[])